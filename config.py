@@ -3,12 +3,26 @@ Configuration management for HomeDashSensor.
 Single responsibility: Load and validate configuration from INI files.
 """
 import configparser
+from functools import cached_property
+import os
 from pathlib import Path
-from typing import Dict, Any, Optional
+import threading
+from typing import Dict, Any, Optional, Tuple
 from dataclasses import dataclass
 
+# Parsed INI files keyed by path, reused while the file's mtime is unchanged
+_FILE_CACHE: Dict[Path, Tuple[int, configparser.ConfigParser]] = {}
+_FILE_CACHE_LOCK = threading.Lock()
 
-@dataclass
+REQUIRED_SECTIONS = ("VL53L5CX", "Detection", "Display", "System")
+
+
+def _parse_hex(value: str) -> int:
+    """ConfigParser converter for hex values such as I2C addresses (0x29 or 29)."""
+    return int(value, 16)
+
+
+@dataclass(frozen=True, slots=True)
 class VL53L5CXConfig:
     """VL53L5CX sensor configuration."""
     enabled: bool = True
@@ -19,7 +33,7 @@ class VL53L5CXConfig:
     sharpener_percent: Optional[int] = None
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class DetectionConfig:
     """Proximity detection configuration."""
     threshold_mm: int = 400
@@ -28,7 +42,7 @@ class DetectionConfig:
     no_presence_required: int = 10
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class DisplayConfig:
     """Display control configuration."""
     fade_in_duration: float = 2.0
@@ -43,7 +57,7 @@ class DisplayConfig:
     fade_steps: int = 600
     fade_easing: str = "quintic"
     
-@dataclass
+@dataclass(frozen=True, slots=True)
 class EnvironmentSensorConfig:
     """Environment configuration."""
     enabled: bool = True
@@ -61,14 +75,15 @@ class EnvironmentSensorConfig:
     temperature_unit: str = "Celsius"
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class SystemConfig:
     """System-wide configuration."""
     update_interval: float = 0.1
     sensor_frequency: int = 15
     log_level: str = "INFO"
+    loop_lateness_probe: bool = False
     
-@dataclass
+@dataclass(frozen=True, slots=True)
 class LightSensorConfig:
     """Ambient light sensor configuration."""
     enabled: bool = True
@@ -80,7 +95,7 @@ class LightSensorConfig:
     measurement_rate: int = 500
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class MQTTConfig:
     """MQTT integration configuration."""
     enabled: bool = True
@@ -94,7 +109,15 @@ class MQTTConfig:
 
 
 class ConfigManager:
-    """Manages configuration loading and validation."""
+    """Manages configuration loading and validation.
+    
+    Section configs are built on first access and cached; load() drops them.
+    """
+    
+    _CACHED_CONFIGS = (
+        "vl53l5cx_config", "detection_config", "display_config", "system_config",
+        "lux_config", "environment_sensor_config", "mqtt_config",
+    )
     
     def __init__(self, config_file: str = "proximity_config.ini"):
         """Initialize configuration manager.
@@ -103,7 +126,7 @@ class ConfigManager:
             config_file: Path to configuration file
         """
         self.config_file = Path(config_file)
-        self._config = configparser.ConfigParser()
+        self._config: configparser.ConfigParser
         self.load()
     
     def load(self) -> None:
@@ -111,27 +134,43 @@ class ConfigManager:
         if not self.config_file.exists():
             raise FileNotFoundError(f"Configuration file not found: {self.config_file}")
         
-        self._config.read(self.config_file)
+        # reuse the parsed file unless it changed on disk since the last load
+        mtime = os.stat(self.config_file).st_mtime_ns
+        with _FILE_CACHE_LOCK:
+            cached = _FILE_CACHE.get(self.config_file)
+            if cached is not None and cached[0] == mtime:
+                self._config = cached[1]
+            else:
+                self._config = configparser.ConfigParser(converters={"hex": _parse_hex})
+                self._config.read(self.config_file)
+                _FILE_CACHE[self.config_file] = (mtime, self._config)
+        for name in self._CACHED_CONFIGS:
+            self.__dict__.pop(name, None)
         
         # Validate required sections
-        required_sections = ["VL53L5CX", "Detection", "Display", "System"]
-        missing = [s for s in required_sections if s not in self._config.sections()]
+        sections = set(self._config.sections())
+        missing = [s for s in REQUIRED_SECTIONS if s not in sections]
         if missing:
             raise ValueError(f"Missing configuration sections: {missing}")
     
-    def get_vl53l5cx_config(self) -> VL53L5CXConfig:
+    @cached_property
+    def vl53l5cx_config(self) -> VL53L5CXConfig:
         """Get VL53L5CX sensor configuration."""
         section = self._config["VL53L5CX"]
+        # optional ints: one lookup each, empty/absent means "leave driver default"
+        integration_time = section.get("integration_time")
+        sharpener_percent = section.get("sharpener_percent")
         return VL53L5CXConfig(
             enabled=section.getboolean("enabled", True),
-            i2c_address=int(section.get("i2c_address", "0x29"), 16),
+            i2c_address=section.gethex("i2c_address", 0x29),
             resolution=section.getint("resolution", 64),
             frequency_hz=section.getint("frequency_hz", 15),
-            integration_time=section.getint("integration_time", fallback=None) if section.get("integration_time", None) else None,
-            sharpener_percent=section.getint("sharpener_percent", fallback=None) if section.get("sharpener_percent", None) else None
+            integration_time=int(integration_time) if integration_time else None,
+            sharpener_percent=int(sharpener_percent) if sharpener_percent else None
         )
     
-    def get_detection_config(self) -> DetectionConfig:
+    @cached_property
+    def detection_config(self) -> DetectionConfig:
         """Get proximity detection configuration."""
         section = self._config["Detection"]
         return DetectionConfig(
@@ -141,7 +180,8 @@ class ConfigManager:
             no_presence_required=section.getint("no_presence_required", 10)
         )
     
-    def get_display_config(self) -> DisplayConfig:
+    @cached_property
+    def display_config(self) -> DisplayConfig:
         """Get display control configuration."""
         section = self._config["Display"]
         return DisplayConfig(
@@ -158,21 +198,24 @@ class ConfigManager:
             fade_easing=section.get("fade_easing", "quintic")
         )
     
-    def get_system_config(self) -> SystemConfig:
+    @cached_property
+    def system_config(self) -> SystemConfig:
         """Get system-wide configuration."""
         section = self._config["System"]
         return SystemConfig(
             update_interval=section.getfloat("update_interval", 0.1),
             sensor_frequency=section.getint("sensor_frequency", 15),
-            log_level=section.get("log_level", "INFO")
+            log_level=section.get("log_level", "INFO"),
+            loop_lateness_probe=section.getboolean("loop_lateness_probe", False)
         )
         
-    def get_lux_config(self) -> LightSensorConfig:
+    @cached_property
+    def lux_config(self) -> LightSensorConfig:
         """Get ambient light sensor configuration."""
         section = self._config["LightSensor"]
         return LightSensorConfig(
             enabled=section.getboolean("enabled", True),
-            i2c_address=int(section.get("i2c_address", "0x23"), 16),
+            i2c_address=section.gethex("i2c_address", 0x23),
             i2c_bus=section.getint("i2c_bus", 1),
             update_interval=section.getfloat("update_interval", 2.0),
             gain=section.getint("gain", 1),
@@ -180,12 +223,13 @@ class ConfigManager:
             measurement_rate=section.getint("measurement_rate", 500)
         )
     
-    def get_environment_sensor_config(self) -> EnvironmentSensorConfig:
+    @cached_property
+    def environment_sensor_config(self) -> EnvironmentSensorConfig:
         """Get environment sensor configuration."""
         section = self._config["EnvironmentSensor"]
         return EnvironmentSensorConfig(
             enabled=section.getboolean("enabled", True),
-            i2c_address=int(section.get("i2c_address", "0x76"), 16),
+            i2c_address=section.gethex("i2c_address", 0x76),
             i2c_bus=section.getint("i2c_bus", 1),
             update_interval=section.getfloat("update_interval", 2.0),
             temperature_oversample=section.getint("temperature_oversample", 8),
@@ -199,7 +243,8 @@ class ConfigManager:
             temperature_unit=section.get("temperature_unit", "Celsius")
         )
     
-    def get_mqtt_config(self) -> MQTTConfig:
+    @cached_property
+    def mqtt_config(self) -> MQTTConfig:
         """Get MQTT integration configuration."""
         if "MQTT" not in self._config.sections():
             # Return default configuration if MQTT section doesn't exist
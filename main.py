@@ -5,7 +5,7 @@ import sys
 from sensors.display_manager import DisplayManager
 from sensors.environment_sensor import EnvironmentSensor
 from sensors.lux_sensor import LuxSensor
-from sensors.proximity_sensor import VL53L5CXSensor
+from sensors.proximity_sensor import VL53L5CXSensor, NUMBA_AVAILABLE, nearest_distance_mm
 from sensors.mqtt_publisher import MQTTPublisher
 from config import ConfigManager
 import numpy as np, time, os, glob
@@ -21,13 +21,13 @@ class HomeDashboardApp:
     def __init__(self):
         self.__config_manager = ConfigManager()
         
-        self.__display_config = self.__config_manager.get_display_config()
-        self.__proximity_sensor_config = self.__config_manager.get_vl53l5cx_config()
-        self.__detection_config = self.__config_manager.get_detection_config()
-        self.__light_sensor_config = self.__config_manager.get_lux_config()
-        self.__environment_sensor_config = self.__config_manager.get_environment_sensor_config()
-        self.__mqtt_config = self.__config_manager.get_mqtt_config()
-        self.__system_config = self.__config_manager.get_system_config()
+        self.__display_config = self.__config_manager.display_config
+        self.__proximity_sensor_config = self.__config_manager.vl53l5cx_config
+        self.__detection_config = self.__config_manager.detection_config
+        self.__light_sensor_config = self.__config_manager.lux_config
+        self.__environment_sensor_config = self.__config_manager.environment_sensor_config
+        self.__mqtt_config = self.__config_manager.mqtt_config
+        self.__system_config = self.__config_manager.system_config
         
         # Setup logging (after configs are loaded)
         self._setup_logging()
@@ -40,6 +40,10 @@ class HomeDashboardApp:
         self.__mqtt_publisher = MQTTPublisher(self.__mqtt_config) if self.__mqtt_config.enabled else None
         
         self.screen_on = False
+        self._res = self.__proximity_sensor_config.resolution
+        # scratch buffers for the per-frame range mask, reused every frame
+        self._valid_mask = np.empty(self._res, dtype=bool)
+        self._mask_scratch = np.empty(self._res, dtype=bool)
         
     async def initialize(self) -> bool:
         self.logger.info("HomeDashboardApp starting...")
@@ -53,93 +57,163 @@ class HomeDashboardApp:
             mqtt_success = await self.__mqtt_publisher.initialize()
             if not mqtt_success:
                 self.logger.warning("MQTT initialization failed, continuing without MQTT")
+                # release its I/O worker (and any half-open client) before dropping it
+                await self.__mqtt_publisher.cleanup()
                 self.__mqtt_publisher = None
                 
         return True
         
     async def run(self):
         """Run the main system loop."""
-        self.last_seen = time.monotonic()
-        
         if not await self.initialize():
             return
         
+        # bind hot-loop attributes to locals once; initialize() may have dropped MQTT
+        monotonic = time.monotonic
+        vl53 = self.__vl53
+        res = self._res
+        valid_mask = self._valid_mask
+        mask_scratch = self._mask_scratch
+        threshold_mm = self.__detection_config.threshold_mm
+        adaptive = self.__display_config.adaptive_brightness_enabled
+        display = self.__display_manager
+        max_brightness = display.max_brightness
+        lux_sensor = self.__lux_sensor
+        mqtt = self.__mqtt_publisher
+        prox_enabled = self.__proximity_sensor_config.enabled
+        env_enabled = self.__environment_sensor_config.enabled
+        env_interval = self.__environment_sensor_config.update_interval
+        if prox_enabled and vl53.sensor is None:
+            # initialize() keeps running without the device; don't poll a missing sensor
+            self.logger.warning("VL53L5CX unavailable, proximity detection disabled")
+            prox_enabled = False
+        # poll on the sensor's frame cadence instead of a fixed tick: sleep until the
+        # next frame is due, and re-check at a fraction of the period if it is late
+        frame_period = 1.0 / max(1, self.__proximity_sensor_config.frequency_hz)
+        retry_delay = frame_period / 4
+        next_poll = monotonic()
+        last_seen = next_poll
+        
+        # slower sensors are polled on their own deadlines inside the proximity loop
+        next_environment_read = monotonic()
+        
+        # optional event-loop lateness probe (see System.loop_lateness_probe)
+        loop = asyncio.get_running_loop()
+        lateness_probe = self.__system_config.loop_lateness_probe
+        lateness_ewma = 0.0
+        next_lateness_report = loop.time()
+        
         try:
+            if not (prox_enabled or env_enabled):
+                # return through the finally below, so MQTT, the VL53 and the display are released
+                self.logger.warning("Proximity and environment sensors are both disabled, nothing to do")
+                return
+            
             while True:
-                if self.__vl53.sensor.data_ready():
-                    frame = self.__vl53.sensor.get_data()
-                    d = np.frombuffer(bytes(frame.distance_mm), dtype="<u2")[:self.__proximity_sensor_config.resolution]
-                    valid = [x for x in d if 0 < x < 8191]
+                # one clock read per iteration; only the sleep below re-reads it,
+                # since awaited fades and sensor reads can take a while
+                now = monotonic()
+                # readiness check and fetch share one hop onto the sensor's I/O worker
+                frame = await vl53.read_frame() if prox_enabled else None
+                if frame is not None:
+                    next_poll = now + frame_period
+                    # zero-copy view over the driver's ctypes buffer
+                    d = np.frombuffer(frame.distance_mm, dtype="<u2", count=res)
+                    # nothing in range reads as 8191 (sensor max), i.e. no presence
+                    if NUMBA_AVAILABLE:
+                        # compiled loop: at 16-64 zones ufunc dispatch outweighs the work
+                        near = int(nearest_distance_mm(d, 8191))
+                    else:
+                        np.greater(d, 0, out=valid_mask)
+                        np.less(d, 8191, out=mask_scratch)
+                        np.logical_and(valid_mask, mask_scratch, out=valid_mask)
+                        near = int(d.min(initial=8191, where=valid_mask))
+                    human_detected = near < threshold_mm
+                    
+                    # publishes only queue on paho's client, so they run inline;
+                    # the 8191 no-target sentinel is not a measurement, so no distance then
+                    if mqtt:
+                        mqtt.publish_proximity_state(human_detected, near if near < 8191 else None)
+                    
+                    # within threshold
+                    if human_detected:
+                        last_seen = now
+                        if not self.screen_on:
+                            reading = await lux_sensor.read_lux()  # read lux to update sensor state
+                            self.logger.info("🙋 Human detected at %dmm, lux=%.2f", near, reading.lux)
+                            
+                            # Publish light data
+                            if mqtt and reading.valid:
+                                mqtt.publish_light_data(reading.lux)
 
-                    if valid:
-                        near = min(valid)
-                        human_detected = near < self.__detection_config.threshold_mm
-                        
-                        # Publish proximity state to MQTT
-                        if self.__mqtt_publisher:
-                            await self.__mqtt_publisher.publish_proximity_state(human_detected, near)
-                        
-                        # within threshold
-                        if human_detected:
-                            last_seen = time.monotonic()
-                            if not self.screen_on:
-                                reading = self.__lux_sensor.get_lux()  # read lux to update sensor state
-                                self.logger.info(f"🙋 Human detected at {near}mm, lux={reading.lux:.2f}")
-                                
-                                # Publish light data
-                                if self.__mqtt_publisher and reading.valid:
-                                    await self.__mqtt_publisher.publish_light_data(reading.lux)
+                            if adaptive and reading.valid:
+                                await display.set_adaptive_brightness(reading.lux)
+                            else:
+                                await display.fade_to(max_brightness)
+                            
+                            # Publish display brightness (once the fade has landed)
+                            if mqtt:
+                                brightness_percent = display.get_brightness() * 100 // max_brightness
+                                mqtt.publish_display_brightness(brightness_percent)
 
-                                if self.__display_config.adaptive_brightness_enabled and reading.valid:
-                                    await self.__display_manager.set_adaptive_brightness(reading.lux)
-                                else:
-                                    self.__display_manager.fade_to(self.__display_manager.max_brightness)
-                                
-                                # Publish display brightness
-                                if self.__mqtt_publisher:
-                                    brightness_percent = int((self.__display_manager.get_brightness() / 255) * 100)
-                                    await self.__mqtt_publisher.publish_display_brightness(brightness_percent)
+                            self.screen_on = True
+                    else:
+                        # object far away
+                        if self.screen_on and (now - last_seen) > 2.0:
+                            if near >= 8191:
+                                self.logger.info("🚶 Human left, no target in range")
+                            else:
+                                self.logger.info("🚶 Human left, distance %dmm", near)
+                            await display.fade_to(0)
+                            
+                            # Publish display off state
+                            if mqtt:
+                                mqtt.publish_display_brightness(0)
+                            
+                            self.screen_on = False
+                elif prox_enabled:
+                    next_poll = now + retry_delay
 
-                                self.screen_on = True
-                        else:
-                            # object far away
-                            if self.screen_on and (time.monotonic() - last_seen) > 2.0:
-                                self.logger.info(f"🚶 Human left, distance {near}mm")
-                                self.__display_manager.fade_to(0)
-                                
-                                # Publish display off state
-                                if self.__mqtt_publisher:
-                                    await self.__mqtt_publisher.publish_display_brightness(0)
-                                
-                                self.screen_on = False
-
-                if self.__environment_sensor_config.enabled:
+                if env_enabled and now >= next_environment_read:
+                    next_environment_read = now + env_interval
                     readings = await self.get_environment_readings()
-                    if readings and self.__mqtt_publisher:
-                        await self.__mqtt_publisher.publish_environment_data(readings)
+                    if readings and mqtt:
+                        mqtt.publish_environment_data(readings)
+                
+                if not prox_enabled:
+                    # environment-only: sleep straight to the (just advanced) next read
+                    next_poll = next_environment_read
                 
-                await asyncio.sleep(0.05)
+                delay = max(0.0, next_poll - monotonic())
+                if lateness_probe:
+                    expected = loop.time() + delay
+                    await asyncio.sleep(delay)
+                    lateness = loop.time() - expected
+                    lateness_ewma += 0.1 * (lateness - lateness_ewma)
+                    if lateness_ewma > 0.05 and loop.time() >= next_lateness_report:
+                        next_lateness_report = loop.time() + 1.0
+                        self.logger.warning("⏱️ Event loop running late: %.0fms (avg %.0fms)", lateness * 1000, lateness_ewma * 1000)
+                else:
+                    await asyncio.sleep(delay)
 
-        except KeyboardInterrupt:
-            try:
-                await self.__vl53.sensor.stop_ranging()
-            except Exception:
-                try:
-                    self.__vl53.sensor.stop_ranging()
-                except Exception:
-                    pass
+        finally:
+            # asyncio.run turns Ctrl-C / SIGINT (the unit's ExecStop) into cancellation of
+            # this task, so shutdown arrives here as CancelledError, never KeyboardInterrupt
+            # stop_ranging runs on the sensor's I/O worker, which is then shut down
+            await self.__vl53.cleanup()
             
             # Clean up MQTT connection
             if self.__mqtt_publisher:
                 await self.__mqtt_publisher.cleanup()
                 
-            self.__display_manager.fade_to(self.__display_manager.max_brightness)
+            await self.__display_manager.fade_to(self.__display_manager.max_brightness)
+            await self.__display_manager.cleanup()
             print("Stopped.")
             
     async def get_environment_readings(self):
         readings = await self.__environment_sensor.read_environmental()
         if readings:
-            self.logger.info(f"🌡️ Environment: {readings.temperature_c:.1f}°C, {readings.humidity_percent:.1f}%, {readings.pressure_hpa:.1f}hPa")
+            self.logger.info("🌡️ Environment: %.1f°C, %.1f%%, %.1fhPa", readings.temperature_c, readings.humidity_percent, readings.pressure_hpa)
         else:
             self.logger.warning("Failed to read environment sensor data.")
         return readings
@@ -164,16 +238,30 @@ async def main():
     try:
         app = HomeDashboardApp()
         await app.run()
-    except KeyboardInterrupt:
-        pass
     except Exception as e:
         logging.error(f"Fatal error: {e}")
         sys.exit(1)
         
+def _run(coro) -> None:
+    """Run coro on uvloop when available unless HDS_LOOP selects the stock asyncio loop."""
+    if os.environ.get("HDS_LOOP", "uvloop") == "uvloop":
+        try:
+            import uvloop
+        except ImportError:
+            pass
+        else:
+            # uvloop.run replaces the event-loop policy install deprecated in Python 3.12
+            uvloop.run(coro)
+            return
+    asyncio.run(coro)
+        
 # ensure script runs and surface errors instead of exiting silently
 if __name__ == "__main__":
     try:
-        asyncio.run(main())
+        _run(main())
+    except KeyboardInterrupt:
+        # re-raised by asyncio.run once the cancelled main task has cleaned up
+        pass
     except Exception as e:
         print("Fatal error:", e, file=sys.stderr)
         raise
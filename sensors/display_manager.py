@@ -1,12 +1,15 @@
+import asyncio
 from dataclasses import dataclass
+import functools
 import glob
+import math
 import os
+import numpy as np
 from pathlib import Path
 from config import DisplayConfig
-import time
-from typing import Optional
+from typing import Final, Optional, Tuple
 
-@dataclass
+@dataclass(slots=True)
 class DisplayState:
     """Current display state."""
     current_brightness: int = 0
@@ -14,10 +17,44 @@ class DisplayState:
     is_fading: bool = False
     is_awake: bool = False
 
+# Easing curves over vectorized fade progress (0..1); unknown names fall back to quintic
+EASING_FNS = {
+    "linear": lambda t: t,
+    "ease_in_out": lambda t: np.where(t < 0.5, 4 * t ** 3, 1 - (-2 * t + 2) ** 3 / 2),
+    "quintic": lambda t: np.where(t < 0.5, 16 * t ** 5, 1 - (-2 * t + 2) ** 5 / 2),
+}
+
+# Backlight updates faster than the panel refresh are never seen; fades are capped to it
+MAX_UPDATE_HZ = 60
+
 BRIGHTNESS_PATH = None       # autodetected below
 #MAX_BRIGHTNESS = None          # will be read from system
-FADE_STEP = 5             # brightness step size (smaller = smoother)
-FADE_DELAY = 0.02         # delay between brightness steps
+
+def _find_brightness_path(pattern: str) -> Optional[str]:
+    """Resolve the configured brightness path, preferring DSI/backlight devices."""
+    if not any(c in pattern for c in "*?["):
+        # concrete path configured: no need to glob
+        return pattern if os.path.exists(pattern) else None
+    base, leaf = os.path.split(pattern)
+    parent, device = os.path.split(base)
+    if device == "*" and not any(c in parent + leaf for c in "*?["):
+        # the usual /sys/class/backlight/*/brightness: one directory scan, no glob
+        matches = []
+        try:
+            with os.scandir(parent) as entries:
+                for entry in entries:
+                    path = os.path.join(entry.path, leaf)
+                    if not entry.name.startswith(".") and os.path.exists(path):
+                        matches.append(path)
+        except OSError:
+            pass
+    else:
+        matches = glob.glob(pattern)
+    # prefer DSI/backlight entries; fall back to first match
+    for path in matches:
+        if "DSI" in path or "backlight" in path:
+            return path
+    return matches[0] if matches else None
 
 class DisplayManager:
     def __init__(self, config: DisplayConfig):
@@ -25,29 +62,64 @@ class DisplayManager:
         self.state = DisplayState()
         
         # --- locate the DSI backlight device ---
-        self.brightness_path = None
-        for path in glob.glob("/sys/class/backlight/*/brightness"):
-            # prefer DSI/backlight entries; fall back to first match
-            if "DSI" in path or "backlight" in path:
-                self.brightness_path = path
-                break
-        if not self.brightness_path:
-            matches = glob.glob("/sys/class/backlight/*/brightness")
-            if matches:
-                self.brightness_path = matches[0]
+        self.brightness_path = _find_brightness_path(self.config.brightness_path)
         if not self.brightness_path:
             raise RuntimeError("Could not find backlight path; try: ls /sys/class/backlight/")
 
         # --- get brightness range ---
         base = os.path.dirname(self.brightness_path)
-        with open(os.path.join(base, "max_brightness")) as f:
-            self.max_brightness = int(f.read().strip())
+        fd = os.open(os.path.join(base, "max_brightness"), os.O_RDONLY)
+        try:
+            self.max_brightness: Final[int] = int(os.read(fd, 16).strip())
+        finally:
+            os.close(fd)
+
+        # brightness fd is opened on first write and kept for the process lifetime
+        self._brightness_fd: Optional[int] = None
+        # encoded sysfs payload for every legal level, so writes don't format per step
+        self._brightness_bytes = [b"%d" % i for i in range(self.max_brightness + 1)]
+        # last value this process wrote successfully (-1: unknown), to drop repeat writes
+        self._last_written = -1
+        # completion future of the fade in flight; a newer fade supersedes it
+        self._fade: Optional[asyncio.Future] = None
+
+        # easing curve is fixed by config, so evaluate it once per step index
+        steps = max(1, self.config.fade_steps)
+        ease = EASING_FNS.get(self.config.fade_easing, EASING_FNS["quintic"])
+        self._ease_table = ease(np.linspace(0.0, 1.0, steps + 1))
+        # ramp indices per write so a fade never outpaces MAX_UPDATE_HZ
+        max_writes = self.config.fade_duration * MAX_UPDATE_HZ
+        self._fade_stride = max(1, math.ceil(steps / max_writes)) if max_writes > 0 else steps
+        # fades mostly repeat the same few (start, target) pairs: wake, sleep, adaptive levels
+        self._fade_steps = functools.lru_cache(maxsize=16)(self._compute_fade_steps)
+
+        # adaptive target per whole-lux bin up to light_threshold_high (pure function of config)
+        self._adaptive_lut = [self._compute_adaptive_target(lux)
+                              for lux in range(int(self.config.light_threshold_high) + 1)]
+
+        # sysfs is read once here; afterwards state.current_brightness tracks our own writes
+        self.refresh()
 
     def set_brightness(self, value: int) -> None:
+        """Write a brightness value to the backlight sysfs node.
+
+        Called inline from the event loop (fade timers included): writes to
+        /sys/class/backlight/*/brightness complete in microseconds, so an
+        executor hop would cost more than the syscall itself.
+        """
         value = max(0, min(value, self.max_brightness))
+        if value == self._last_written:
+            return
+        self._set_brightness_unchecked(value)
+
+    def _set_brightness_unchecked(self, value: int) -> None:
+        """Write an already-clamped brightness (0..max_brightness); fade steps use this directly."""
         try:
-            with open(self.brightness_path, "w") as f:
-                f.write(str(value))
+            if self._brightness_fd is None:
+                self._brightness_fd = os.open(self.brightness_path, os.O_WRONLY)
+            # positioned overwrite: one syscall per step instead of open/write/close
+            os.pwrite(self._brightness_fd, self._brightness_bytes[value], 0)
+            self.state.current_brightness = self._last_written = value
         except PermissionError:
             # don't exit the process here; let caller decide
             raise PermissionError("Need permission to write backlight brightness")
@@ -57,6 +129,20 @@ class DisplayManager:
         if not self.config.adaptive_brightness_enabled:
             return
         
+        lux_bin = int(lux)
+        if 0 <= lux_bin < len(self._adaptive_lut):
+            target = self._adaptive_lut[lux_bin]
+        else:
+            target = self._compute_adaptive_target(lux)
+        
+        # Only adjust if significantly different (avoid constant micro-adjustments)
+        if abs(target - self.state.target_brightness) > 10:
+            #async with self._lock:
+                #await self._start_fade(target, self.config.fade_duration * 0.5)
+            await self.fade_to(target)
+
+    def _compute_adaptive_target(self, lux: float) -> int:
+        """Target brightness for an ambient light level."""
         # Calculate target brightness based on ambient light
         if lux <= self.config.light_threshold_low:
             target = self.config.min_brightness + 50  # Dim but visible
@@ -68,27 +154,102 @@ class DisplayManager:
                 self.config.light_threshold_high - self.config.light_threshold_low
             )
             target = int(50 + ratio * (self.config.max_brightness - 50))
-        
-        # Only adjust if significantly different (avoid constant micro-adjustments)
-        if abs(target - self.state.target_brightness) > 10:
-            #async with self._lock:
-                #await self._start_fade(target, self.config.fade_duration * 0.5)
-            self.fade_to(target)
+        return target
 
 
     def get_brightness(self) -> int:
+        """Return the last brightness written (or read by refresh()); never touches sysfs."""
+        return self.state.current_brightness
+
+    def refresh(self) -> int:
+        """Re-read brightness from sysfs, e.g. after something else wrote the backlight."""
+        self._last_written = -1
         try:
             with open(self.brightness_path) as f:
-                return int(f.read().strip())
+                self.state.current_brightness = int(f.read().strip())
         except Exception:
-            return self.max_brightness
+            self.state.current_brightness = self.max_brightness
+        return self.state.current_brightness
+
+    async def fade_to(self, target: int) -> None:
+        # clamp up front so a target above max_brightness doesn't turn the
+        # tail of the fade into repeated writes of the same clamped value
+        target = max(0, min(target, self.max_brightness))
+        # latest target wins: release any fade still in flight, its pending
+        # steps become no-ops and we retarget from wherever it got to
+        if self._fade is not None and not self._fade.done():
+            self._fade.set_result(None)
+        self.state.target_brightness = target
+        start = self.state.current_brightness
+        diff = target - start
+        if diff == 0:
+            return
+        step_delay = self.config.fade_duration / (len(self._ease_table) - 1)
+        changes = self._fade_steps(start, target)
+
+        # schedule every write up front against absolute loop deadlines and
+        # wait on a single future, instead of one sleep/wakeup per step
+        loop = asyncio.get_running_loop()
+        done = self._fade = loop.create_future()
+        t0 = loop.time()
+        deadlines = [t0 + i * step_delay for i, _ in changes]
+        # each step knows when its successor is due (None for the final write)
+        next_deadlines = deadlines[1:] + [None]
+        handles = [
+            loop.call_at(deadline, self._apply_fade_step, b, done, next_deadline)
+            for (_, b), deadline, next_deadline in zip(changes, deadlines, next_deadlines)
+        ]
+        self.state.is_fading = True
+        try:
+            await done
+        finally:
+            for handle in handles:
+                handle.cancel()
+            if self._fade is done:
+                self._fade = None
+                self.state.is_fading = False
+
+    def _compute_fade_steps(self, start: int, target: int) -> Tuple[Tuple[int, int], ...]:
+        """Return (step index, brightness) for each refresh-aligned step where the eased value changes."""
+        # whole brightness ramp in one vectorized pass; endpoint pinned to target
+        ramp = np.rint(start + (target - start) * self._ease_table).astype(np.int32)
+        ramp[-1] = target
+        values = ramp.tolist()
+        # sample at most one value per refresh interval, always landing on the endpoint
+        last = len(values) - 1
+        changes = []
+        previous = start
+        for i in [*range(self._fade_stride, last, self._fade_stride), last]:
+            if values[i] != previous:
+                changes.append((i, values[i]))
+                previous = values[i]
+        return tuple(changes)
+
+    def _apply_fade_step(self, value: int, done: asyncio.Future, next_deadline: Optional[float]) -> None:
+        """Timer callback writing one fade step; resolves `done` after the last.
 
-    def fade_to(self, target: int):
-        current = self.get_brightness()
-        step = FADE_STEP if target > current else -FADE_STEP
-        if step == 0:
+        A step that runs after its successor is already due is dropped, so a
+        stalled loop catches up with one write instead of replaying the backlog.
+        """
+        if done.done():
             return
-        for b in range(current, target, step):
-            self.set_brightness(b)
-            time.sleep(FADE_DELAY)
-        self.set_brightness(target)
\ No newline at end of file
+        final = next_deadline is None
+        if not final and asyncio.get_running_loop().time() >= next_deadline:
+            return
+        try:
+            # ramp values lie between two clamped endpoints, so skip the clamp
+            self._set_brightness_unchecked(value)
+        except Exception as e:
+            done.set_exception(e)
+            return
+        if final:
+            done.set_result(None)
+
+    async def cleanup(self) -> None:
+        """Close the cached brightness file descriptor."""
+        if self._brightness_fd is not None:
+            try:
+                os.close(self._brightness_fd)
+            except OSError:
+                pass
+            self._brightness_fd = None
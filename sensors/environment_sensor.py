@@ -1,20 +1,32 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+import functools
+import random
 import time
 import asyncio
 from typing import Optional
-from sensors.sensor_interface import SensorInterface
 import logging
 from config import EnvironmentSensorConfig
 
-# Prefer Pimoroni bme690 library when available; fall back to bme680 for compatibility
-try:
-    import bme690 as _bme_lib  # type: ignore
-    BME_LIB_NAME = "bme690"
-except Exception:
-    import bme680 as _bme_lib  # type: ignore
-    BME_LIB_NAME = "bme680"
+def _load_bme_lib():
+    """Import the driver on first use: prefer Pimoroni bme690, fall back to bme680."""
+    try:
+        import bme690 as lib  # type: ignore
+        return lib, "bme690"
+    except Exception:
+        import bme680 as lib  # type: ignore
+        return lib, "bme680"
 
-@dataclass
+@functools.lru_cache(maxsize=None)
+def _driver_constants(lib):
+    """Oversample and filter-size constants of a driver module, resolved once per module."""
+    oversample = {v: getattr(lib, f"OS_{v}X", None) for v in (1, 2, 4, 8, 16)}
+    filter_size = {i: getattr(lib, f"FILTER_SIZE_{i}", None) for i in range(4)}
+    return oversample, filter_size
+
+# private RNG for simulated readings when no sensor is attached
+_RNG = random.Random()
+
+@dataclass(slots=True)
 class EnvironmentalReading:
     """Environmental sensor reading data."""
     temperature_c: float
@@ -22,13 +34,16 @@ class EnvironmentalReading:
     pressure_hpa: float
     gas_resistance_ohms: Optional[float] = None
     valid: bool = True
-    timestamp: float = 0.0
-    
-    def __post_init__(self):
-        if self.timestamp == 0.0:
-            self.timestamp = time.time()
+    timestamp: float = field(default_factory=time.monotonic)
+
+class EnvironmentSensor:
+    """BME690/BME680 environmental sensor interface.
+
+    Reads run in the default executor, so this sensor can be awaited
+    concurrently with the others (asyncio.gather); each device sits on
+    its own I2C address.
+    """
 
-class EnvironmentSensor(SensorInterface):
     def __init__(self, config: EnvironmentSensorConfig):
         """Initialize BME680 sensor.
 
@@ -39,39 +54,30 @@ class EnvironmentSensor(SensorInterface):
         self.sensor = None
         self.logger = logging.getLogger(self.__class__.__name__)
         self._initialized = False
+        # monotonic time before which the sensor is still warming up
+        self._ready_at = 0.0
 
     async def initialize(self) -> bool:
         """Initialize BME680 sensor."""
         try:
+            # driver import is deferred to here so a disabled/absent sensor costs nothing at startup
+            lib, lib_name = _load_bme_lib()
+            
             # construct sensor using configured I2C address (adapter handles lib differences)
             # bme690 and bme680 constructors differ; try to be flexible
             try:
-                self.sensor = _bme_lib.BME690(self.config.i2c_address) if BME_LIB_NAME == "bme690" else _bme_lib.BME680(self.config.i2c_address)
+                self.sensor = lib.BME690(self.config.i2c_address) if lib_name == "bme690" else lib.BME680(self.config.i2c_address)
             except Exception:
                 # some libraries accept no args
-                self.sensor = _bme_lib.BME690() if BME_LIB_NAME == "bme690" else _bme_lib.BME680()
+                self.sensor = lib.BME690() if lib_name == "bme690" else lib.BME680()
             
             # Configure sensor for optimal performance
             # Map oversample and filter constants from the selected library
-            # The Pimoroni bme690 exposes similar constants to bme680; try to adapt
-            lib = _bme_lib
-
-            def _os_const(kind: str, value: int):
-                # kind is one of 'OS' (oversample) or 'FILTER'
-                try:
-                    if kind == 'OS':
-                        return getattr(lib, f"OS_{value}X")
-                except Exception:
-                    pass
-                # fallback constants expected by bme680/bme690
-                try:
-                    return getattr(lib, f"OS_{value}X")
-                except Exception:
-                    return None
-
-            TEMPERATURE_OVERSAMPLE = _os_const('OS', self.config.temperature_oversample) or getattr(lib, 'OS_8X', None)
-            PRESSURE_OVERSAMPLE = _os_const('OS', self.config.pressure_oversample) or getattr(lib, 'OS_8X', None)
-            HUMIDITY_OVERSAMPLE = _os_const('OS', self.config.humidity_oversample) or getattr(lib, 'OS_8X', None)
+            # The Pimoroni bme690 exposes similar constants to bme680; unknown values fall back to 8x
+            oversample, filter_size = _driver_constants(lib)
+            TEMPERATURE_OVERSAMPLE = oversample.get(self.config.temperature_oversample) or oversample[8]
+            PRESSURE_OVERSAMPLE = oversample.get(self.config.pressure_oversample) or oversample[8]
+            HUMIDITY_OVERSAMPLE = oversample.get(self.config.humidity_oversample) or oversample[8]
 
             if TEMPERATURE_OVERSAMPLE is not None:
                 try:
@@ -89,18 +95,13 @@ class EnvironmentSensor(SensorInterface):
                 except Exception:
                     pass
 
-            # Map configured filter size to library constant if possible
-            try:
-                filt = int(self.config.filter_size)
-                filt = max(0, min(filt, 3))
-                filter_const = getattr(lib, f"FILTER_SIZE_{filt}")
+            # Map configured filter size to library constant if possible (ignored if not present)
+            filter_const = filter_size[max(0, min(int(self.config.filter_size), 3))]
+            if filter_const is not None:
                 try:
                     self.sensor.set_filter(filter_const)
                 except Exception:
                     pass
-            except Exception:
-                # ignore if constants not present
-                pass
             
             # Configure gas sensor
             if self.config.gas_enabled:
@@ -119,19 +120,13 @@ class EnvironmentSensor(SensorInterface):
                 except Exception:
                     pass
             
-            self._initialized = True
-            # Allow sensor a short warm-up before the first read
-            try:
-                await asyncio.sleep(0.5)
-            except Exception:
-                # if event loop isn't available for some reason, ignore
-                pass
-
+            # Allow sensor a short warm-up; the first read waits out the rest instead of startup
+            self._ready_at = time.monotonic() + 0.5
             self._initialized = True
             self.logger.info("BME690 initialized successfully")
             return True
         except Exception as e:
-            self.logger.error(f"BME690 init failed: {e}")
+            self.logger.error("BME690 init failed: %s", e)
             self.sensor = None
             self._initialized = False
             return False
@@ -143,16 +138,21 @@ class EnvironmentSensor(SensorInterface):
         
         if self.sensor is None:
             # Simulate reasonable environmental conditions
-            import random
             return EnvironmentalReading(
-                temperature_c=random.uniform(18, 26),
-                humidity_percent=random.uniform(30, 70),
-                pressure_hpa=random.uniform(1000, 1025),
-                gas_resistance_ohms=random.uniform(10000, 200000)
+                temperature_c=_RNG.uniform(18, 26),
+                humidity_percent=_RNG.uniform(30, 70),
+                pressure_hpa=_RNG.uniform(1000, 1025),
+                gas_resistance_ohms=_RNG.uniform(10000, 200000)
             )
         
+        warmup = self._ready_at - time.monotonic()
+        if warmup > 0:
+            await asyncio.sleep(warmup)
+        
         try:
-            if self.sensor.get_sensor_data():
+            # blocking I2C transaction; keep it off the event loop
+            ready = await asyncio.get_running_loop().run_in_executor(None, self.sensor.get_sensor_data)
+            if ready:
                 return EnvironmentalReading(
                     temperature_c=self.sensor.data.temperature,
                     humidity_percent=self.sensor.data.humidity,
@@ -163,7 +163,7 @@ class EnvironmentSensor(SensorInterface):
                 return None
                 
         except Exception as e:
-            self.logger.error(f"BME690 read error: {e}")
+            self.logger.error("BME690 read error: %s", e)
             return None
     
     async def cleanup(self) -> None:
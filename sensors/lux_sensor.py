@@ -1,23 +1,17 @@
 import asyncio
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 import logging
 import time
-import ltr559
 
-from sensors.sensor_interface import SensorInterface
 
-@dataclass
+@dataclass(slots=True)
 class LightReading:
     """Light sensor reading data."""
     lux: float
     valid: bool = True
-    timestamp: float = 0.0
-    
-    def __post_init__(self):
-        if self.timestamp == 0.0:
-            self.timestamp = time.time()
+    timestamp: float = field(default_factory=time.monotonic)
             
-class LuxSensor(SensorInterface):
+class LuxSensor:
     """Ambient light sensor interface."""
     
     def __init__(self, config):
@@ -34,7 +28,8 @@ class LuxSensor(SensorInterface):
         try:            
             self.logger.info("Initializing ambient light sensor...")
             
-            # Initialize sensor with appropriate library
+            # Initialize sensor with appropriate library (imported only when enabled)
+            import ltr559
             self.sensor = ltr559.LTR559()
             
             # Configure sensor for optimal performance
@@ -45,7 +40,7 @@ class LuxSensor(SensorInterface):
             self.logger.info("Ambient light sensor initialized successfully")
             return True
         except Exception as e:
-            self.logger.error(f"Failed to initialize ambient light sensor: {e}")
+            self.logger.error("Failed to initialize ambient light sensor: %s", e)
             self.sensor = None            
             return True
     
@@ -58,9 +53,13 @@ class LuxSensor(SensorInterface):
             lux_value = self.sensor.get_lux()
             return LightReading(lux=lux_value, valid=True)
         except Exception as e:
-            self.logger.error(f"Error reading lux value: {e}")
+            self.logger.error("Error reading lux value: %s", e)
             return LightReading(lux=0.0, valid=False)
     
+    async def read_lux(self) -> LightReading:
+        """Read ambient light with the blocking I2C transaction off the event loop."""
+        return await asyncio.get_running_loop().run_in_executor(None, self.get_lux)
+    
     async def cleanup(self) -> None:
         """Clean up LTR559 sensor."""
         # LTR559 doesn't require explicit cleanup
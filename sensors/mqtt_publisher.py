@@ -2,14 +2,45 @@
 MQTT Publisher for Home Assistant integration.
 Provides auto-discovery and real-time sensor data publishing.
 """
+import hashlib
 import json
 import asyncio
 import logging
-from typing import Optional, Dict, Any
-from dataclasses import asdict
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, Tuple, Union
 import paho.mqtt.client as mqtt
 from config import MQTTConfig
 
+# orjson is optional; both paths return compact UTF-8 bytes, which paho publishes as-is
+try:
+    import orjson  # type: ignore
+    _dumps = orjson.dumps
+except ImportError:
+    def _dumps(obj: Any) -> bytes:
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+# Environment values share one JSON state document; HA picks each field via value_template
+ENVIRONMENT_FIELDS = ("temperature", "humidity", "pressure")
+
+# (sensor_id, display name, unit, HA device_class) for every sensor entity
+SENSOR_ENTITIES = (
+    ("temperature", "Temperature", "°C", "temperature"),
+    ("humidity", "Humidity", "%", "humidity"),
+    ("pressure", "Pressure", "hPa", "pressure"),
+    ("distance", "Distance", "mm", None),
+    ("lux", "Ambient Light", "lx", "illuminance"),
+    ("display_brightness", "Display Brightness", "%", None),
+)
+
+# Sent to each legacy per-entity discovery topic so HA hands the entity over to the
+# device config instead of deleting it (HA 2025.1+ discovery migration)
+MIGRATE_DISCOVERY_PAYLOAD = b'{"migrate_discovery":true}'
+
+# Unchanged state is re-sent at most this often, so HA still sees the sensor as alive
+FORCE_REPUBLISH_S = 30.0
+
 
 class MQTTPublisher:
     """MQTT publisher for Home Assistant integration."""
@@ -19,11 +50,33 @@ class MQTTPublisher:
         self.logger = logging.getLogger(self.__class__.__name__)
         self.client: Optional[mqtt.Client] = None
         self._connected = False
+        # set from paho's network thread once the first CONNACK arrives
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._connect_event: Optional[asyncio.Event] = None
+        # blocking paho calls get their own worker instead of the shared default executor
+        self._io_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="mqtt-io")
+        
+        # topics and discovery payloads depend only on config; build them once
+        prefix = config.topic_prefix
+        self._topic_proximity = f"{prefix}/proximity/state"
+        self._topic_distance = f"{prefix}/sensor/distance"
+        self._topic_lux = f"{prefix}/sensor/lux"
+        self._topic_display_brightness = f"{prefix}/sensor/display_brightness"
+        self._topic_environment = f"{prefix}/environment/state"
+        self._discovery_message = self._build_discovery_message()
+        # discovery is retained on the broker; it is only re-sent when the payload
+        # differs from the last one published (or none has been published yet)
+        self._discovery_hash = hashlib.sha256(self._discovery_message[1]).hexdigest()
+        self._published_discovery_hash: Optional[str] = None
+        # topic -> (last payload sent, monotonic deadline for forcing a resend)
+        self._last_sent: Dict[str, Tuple[Union[str, bytes], float]] = {}
         
     async def initialize(self) -> bool:
         """Initialize MQTT connection."""
         try:
-            self.client = mqtt.Client(client_id=self.config.client_id)
+            self._loop = asyncio.get_running_loop()
+            self._connect_event = asyncio.Event()
+            self.client = mqtt.Client(client_id=self.config.client_id, protocol=mqtt.MQTTv5)
             
             # Set credentials if provided
             if self.config.username and self.config.password:
@@ -32,10 +85,11 @@ class MQTTPublisher:
             # Set callbacks
             self.client.on_connect = self._on_connect
             self.client.on_disconnect = self._on_disconnect
+            self.client.on_message = self._on_message
             
             # Connect to broker
-            await asyncio.get_event_loop().run_in_executor(
-                None, 
+            await self._loop.run_in_executor(
+                self._io_pool,
                 self.client.connect, 
                 self.config.broker_host, 
                 self.config.broker_port, 
@@ -45,14 +99,17 @@ class MQTTPublisher:
             # Start loop in background
             self.client.loop_start()
             
-            # Wait for connection
-            for _ in range(50):  # 5 second timeout
-                if self._connected:
-                    break
-                await asyncio.sleep(0.1)
+            # Wait for the CONNACK (success or refusal), 5 second timeout
+            try:
+                await asyncio.wait_for(self._connect_event.wait(), timeout=5.0)
+            except asyncio.TimeoutError:
+                pass
+            finally:
+                # later reconnects are reported through _connected only
+                self._connect_event = None
             
             if self._connected:
-                await self._publish_discovery_configs()
+                self._publish_discovery_configs()
                 self.logger.info("🌐 MQTT publisher initialized successfully")
                 return True
             else:
@@ -60,24 +117,85 @@ class MQTTPublisher:
                 return False
                 
         except Exception as e:
-            self.logger.error(f"MQTT initialization failed: {e}")
+            self.logger.error("MQTT initialization failed: %s", e)
             return False
     
-    def _on_connect(self, client, userdata, flags, rc):
+    def _on_connect(self, client, userdata, flags, rc, properties=None):
         """Callback for MQTT connection."""
         if rc == 0:
             self._connected = True
-            self.logger.info(f"🔗 Connected to MQTT broker at {self.config.broker_host}")
+            self.logger.info("🔗 Connected to MQTT broker at %s", self.config.broker_host)
+            # the broker replays any retained per-entity config from older versions;
+            # _on_message migrates those, so installs without them publish nothing extra
+            client.subscribe([(legacy_topic, 1) for legacy_topic in self._legacy_discovery_topics()])
         else:
-            self.logger.error(f"MQTT connection failed with code {rc}")
+            self.logger.error("MQTT connection failed with code %s", rc)
+        event = self._connect_event
+        if self._loop is None:
+            return
+        if event is not None:
+            self._loop.call_soon_threadsafe(event.set)
+        elif rc == 0 and self._published_discovery_hash != self._discovery_hash:
+            # reconnect after initialize() with discovery not yet sent: send it from the event loop
+            self._loop.call_soon_threadsafe(self._publish_discovery_configs)
+    
+    def _on_message(self, client, userdata, msg):
+        """Callback for messages on the legacy discovery topics."""
+        # only a retained, non-empty config left by an older version needs migrating;
+        # our own migrate/clear publishes come back with the retain flag unset
+        if msg.retain and msg.payload and self._loop is not None:
+            self._loop.call_soon_threadsafe(self._migrate_legacy_discovery, msg.topic)
     
-    def _on_disconnect(self, client, userdata, rc):
+    def _on_disconnect(self, client, userdata, rc, properties=None):
         """Callback for MQTT disconnection."""
         self._connected = False
+        # anything queued around the drop may be lost; resend every state on reconnect
+        self._last_sent.clear()
         self.logger.warning("🔌 Disconnected from MQTT broker")
     
-    async def _publish_discovery_configs(self):
-        """Publish Home Assistant discovery configurations."""
+    def _publish_discovery_configs(self, force: bool = False):
+        """Publish the Home Assistant discovery configuration.
+        
+        Runs on the event loop: from initialize(), and again from _on_connect
+        after a reconnect while discovery is not yet published. Skipped when
+        this payload was already published, unless force is set.
+        """
+        if not force and self._published_discovery_hash == self._discovery_hash:
+            return
+        topic, payload = self._discovery_message
+        # discovery must survive broker restarts: retained and acknowledged
+        if self._publish(topic, payload, qos=1, retain=True):
+            self._published_discovery_hash = self._discovery_hash
+    
+    def _migrate_legacy_discovery(self, legacy_topic: str):
+        """Move a retained per-entity config from an older version to the device config.
+        
+        Uses HA's migration handshake, so the entity keeps its registry entry
+        (entity_id renames, areas, disabled flag): mark the old topic for
+        migration, re-send the device config, then clear the old topic.
+        """
+        if not self._publish(legacy_topic, MIGRATE_DISCOVERY_PAYLOAD, qos=1, retain=True):
+            return
+        self._published_discovery_hash = None
+        self._publish_discovery_configs(force=True)
+        if (self._published_discovery_hash == self._discovery_hash
+                and self._publish(legacy_topic, b"", qos=1, retain=True)):
+            self.logger.info("Migrated legacy discovery config %s", legacy_topic)
+    
+    def _legacy_discovery_topics(self) -> Tuple[str, ...]:
+        """Per-entity discovery topics used before device-based discovery."""
+        device_id = self.config.device_id
+        return (
+            *(f"homeassistant/sensor/{device_id}_{sensor_id}/config" for sensor_id, *_ in SENSOR_ENTITIES),
+            f"homeassistant/binary_sensor/{device_id}_proximity/config",
+        )
+    
+    def _build_discovery_message(self) -> Tuple[str, bytes]:
+        """Build the (topic, encoded payload) for Home Assistant device-based discovery.
+        
+        A single retained message carries every entity as a component of the
+        device, instead of one config message per entity.
+        """
         device_info = {
             "identifiers": [self.config.device_id],
             "name": "HomeDashSensor",
@@ -85,91 +203,112 @@ class MQTTPublisher:
             "manufacturer": "HomeDashSensor"
         }
         
-        # Proximity sensor discovery
-        proximity_config = {
-            "name": "HomeDash Proximity",
-            "unique_id": f"{self.config.device_id}_proximity",
-            "state_topic": f"{self.config.topic_prefix}/proximity/state",
-            "device_class": "occupancy",
-            "payload_on": "detected",
-            "payload_off": "clear",
-            "device": device_info
+        # Binary sensor for proximity
+        components: Dict[str, Dict[str, Any]] = {
+            "proximity": {
+                "platform": "binary_sensor",
+                "name": "HomeDash Proximity",
+                "unique_id": f"{self.config.device_id}_proximity",
+                "state_topic": self._topic_proximity,
+                "device_class": "occupancy",
+                "payload_on": "detected",
+                "payload_off": "clear"
+            }
         }
         
         # Environment sensors discovery
-        sensors = [
-            ("temperature", "Temperature", "°C", "temperature"),
-            ("humidity", "Humidity", "%", "humidity"),
-            ("pressure", "Pressure", "hPa", "pressure"),
-            ("distance", "Distance", "mm", None),
-            ("lux", "Ambient Light", "lx", "illuminance"),
-            ("display_brightness", "Display Brightness", "%", None)
-        ]
-        
-        for sensor_id, name, unit, device_class in sensors:
+        for sensor_id, name, unit, device_class in SENSOR_ENTITIES:
             sensor_config = {
+                "platform": "sensor",
                 "name": f"HomeDash {name}",
                 "unique_id": f"{self.config.device_id}_{sensor_id}",
                 "state_topic": f"{self.config.topic_prefix}/sensor/{sensor_id}",
-                "unit_of_measurement": unit,
-                "device": device_info
+                "unit_of_measurement": unit
             }
+            if sensor_id in ENVIRONMENT_FIELDS:
+                sensor_config["state_topic"] = self._topic_environment
+                sensor_config["value_template"] = f"{{{{ value_json.{sensor_id} }}}}"
             if device_class:
                 sensor_config["device_class"] = device_class
-            
-            await self._publish(
-                f"homeassistant/sensor/{self.config.device_id}_{sensor_id}/config",
-                json.dumps(sensor_config),
-                retain=True
-            )
+            components[sensor_id] = sensor_config
         
-        # Binary sensor for proximity
-        await self._publish(
-            f"homeassistant/binary_sensor/{self.config.device_id}_proximity/config",
-            json.dumps(proximity_config),
-            retain=True
+        payload = {
+            "device": device_info,
+            "origin": {"name": "HomeDashSensor"},
+            "components": components
+        }
+        return (
+            f"homeassistant/device/{self.config.device_id}/config",
+            _dumps(payload)
         )
     
-    async def publish_proximity_state(self, human_present: bool, distance_mm: int):
-        """Publish proximity detection state."""
+    def publish_proximity_state(self, human_present: bool, distance_mm: Optional[int]):
+        """Publish proximity detection state; distance_mm is None when nothing is in range."""
         state = "detected" if human_present else "clear"
-        await self._publish(f"{self.config.topic_prefix}/proximity/state", state)
-        await self._publish(f"{self.config.topic_prefix}/sensor/distance", str(distance_mm))
+        self._publish_state(self._topic_proximity, state)
+        if distance_mm is not None:
+            # 10 mm buckets: finer than that is sensor noise, and it lets repeats dedupe
+            self._publish_state(self._topic_distance, str(distance_mm - distance_mm % 10))
     
-    async def publish_environment_data(self, reading):
+    def publish_environment_data(self, reading):
         """Publish environmental sensor data."""
         if reading:
-            await self._publish(f"{self.config.topic_prefix}/sensor/temperature", f"{reading.temperature_c:.2f}")
-            await self._publish(f"{self.config.topic_prefix}/sensor/humidity", f"{reading.humidity_percent:.2f}")
-            await self._publish(f"{self.config.topic_prefix}/sensor/pressure", f"{reading.pressure_hpa:.2f}")
+            # one message updates all environment entities, at dashboard precision
+            payload = _dumps({
+                "temperature": round(reading.temperature_c, 1),
+                "humidity": round(reading.humidity_percent, 1),
+                "pressure": round(reading.pressure_hpa, 1)
+            })
+            self._publish_state(self._topic_environment, payload)
     
-    async def publish_light_data(self, lux: float):
+    def publish_light_data(self, lux: float):
         """Publish ambient light data."""
-        await self._publish(f"{self.config.topic_prefix}/sensor/lux", f"{lux:.2f}")
+        self._publish_state(self._topic_lux, f"{lux:.1f}")
     
-    async def publish_display_brightness(self, brightness_percent: int):
+    def publish_display_brightness(self, brightness_percent: int):
         """Publish current display brightness."""
-        await self._publish(f"{self.config.topic_prefix}/sensor/display_brightness", str(brightness_percent))
+        self._publish_state(self._topic_display_brightness, str(brightness_percent))
     
-    async def _publish(self, topic: str, payload: str, retain: bool = False):
-        """Publish message to MQTT broker."""
-        if not self._connected or not self.client:
+    def _publish_state(self, topic: str, payload: Union[str, bytes]):
+        """Publish a state value, skipping repeats of the last payload on that topic.
+        
+        An unchanged payload is still re-sent once FORCE_REPUBLISH_S has passed.
+        """
+        now = time.monotonic()
+        last = self._last_sent.get(topic)
+        if last is not None and last[0] == payload and now < last[1]:
             return
+        if self._publish(topic, payload):
+            self._last_sent[topic] = (payload, now + FORCE_REPUBLISH_S)
+    
+    def _publish(self, topic: str, payload: Union[str, bytes], qos: int = 0, retain: bool = False) -> bool:
+        """Queue a message for the broker.
+        
+        Telemetry defaults to QoS 0: each sample supersedes the last, so a
+        PUBACK round-trip per message only adds latency.
+        
+        paho's publish() only appends to the client's outgoing queue; the
+        loop_start() network thread does the socket write, so there is no
+        blocking work here worth an executor hop.
+        
+        Returns True if the message was queued.
+        """
+        if not self._connected or not self.client:
+            return False
         
         try:
-            await asyncio.get_event_loop().run_in_executor(
-                None,
-                self.client.publish,
-                topic,
-                payload,
-                1,  # QoS
-                retain
-            )
+            info = self.client.publish(topic, payload, qos, retain)
+            if info.rc != mqtt.MQTT_ERR_SUCCESS:
+                self.logger.error("Failed to publish to %s: %s", topic, mqtt.error_string(info.rc))
+                return False
+            return True
         except Exception as e:
-            self.logger.error(f"Failed to publish to {topic}: {e}")
+            self.logger.error("Failed to publish to %s: %s", topic, e)
+            return False
     
     async def cleanup(self):
         """Clean up MQTT connection."""
         if self.client:
             self.client.loop_stop()
-            self.client.disconnect()
\ No newline at end of file
+            self.client.disconnect()
+        self._io_pool.shutdown(wait=False)
\ No newline at end of file
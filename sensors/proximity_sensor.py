@@ -1,24 +1,103 @@
 import asyncio
-from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 import logging
 import time
 from typing import Optional
-from sensors.sensor_interface import SensorInterface
+import numpy as np
 
-@dataclass
+# Numba is optional; without it the NumPy path in _process_ranging_data is used
+try:
+    from numba import njit  # type: ignore
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+# Driver imports happen once at module load, not on every (re)initialization
+try:
+    import vl53l5cx_ctypes as vl53l5cx
+    from vl53l5cx.vl53l5cx import VL53L5CX_RESOLUTION_8X8, VL53L5CX_RESOLUTION_4X4
+    VL53L5CX_AVAILABLE = True
+except (ImportError, OSError):
+    # OSError: vl53l5cx_ctypes loads its shared library at import (missing or wrong-arch .so)
+    VL53L5CX_AVAILABLE = False
+
+# Center 4x4 block of the 8x8 zone grid; at 4x4 resolution every zone is used
+CENTER_ZONES_8X8 = np.array([18, 19, 20, 21, 26, 27, 28, 29, 34, 35, 36, 37, 42, 43, 44, 45], dtype=np.intp)
+CENTER_ZONES_4X4 = np.arange(16, dtype=np.intp)
+
+# Cached readings older than this are treated as missing rather than re-served
+MAX_READING_AGE_S = 0.5
+
+# Detection thresholds in mm; kept as ints so zone comparisons never promote to float
+MIN_VALID_MM = 50
+MAX_VALID_MM = 4000
+ZONE_THRESHOLD_MM = 2000
+
+# Below this bus clock the frame transfer, not the sensor, bounds the ranging rate
+MIN_I2C_CLOCK_HZ = 400_000
+I2C_CLOCK_PATH = "/sys/class/i2c-adapter/i2c-1/of_node/clock-frequency"
+
+
+def _i2c_clock_hz(path: str = I2C_CLOCK_PATH) -> Optional[int]:
+    """Configured I2C bus clock from the device tree (big-endian u32), or None if unknown."""
+    try:
+        with open(path, "rb") as f:
+            raw = f.read(4)
+    except OSError:
+        return None
+    return int.from_bytes(raw, "big") if len(raw) == 4 else None
+
+
+def _reduce_zones(distances, status, zones, zone_threshold):
+    """Single pass over the selected zones: (min valid distance, zones in range, valid count)."""
+    min_distance = MAX_VALID_MM
+    zones_in_range = 0
+    n_valid = 0
+    for k in range(zones.shape[0]):
+        i = zones[k]
+        d = distances[i]
+        st = status[i]
+        # Status 6 = valid target, 13 = valid with low signal
+        if (st == 6 or st == 13) and MIN_VALID_MM <= d <= MAX_VALID_MM:
+            n_valid += 1
+            if d <= zone_threshold:
+                zones_in_range += 1
+            if d < min_distance:
+                min_distance = d
+    return min_distance, zones_in_range, n_valid
+
+
+def nearest_distance_mm(distances, limit):
+    """Smallest distance in (0, limit) over a raw distance frame, or limit if none is."""
+    near = limit
+    for k in range(distances.shape[0]):
+        d = distances[k]
+        if 0 < d < near:
+            near = d
+    return near
+
+
+if NUMBA_AVAILABLE:
+    _reduce_zones = njit(cache=True)(_reduce_zones)
+    nearest_distance_mm = njit(cache=True, boundscheck=False)(nearest_distance_mm)
+
+@dataclass(frozen=True, slots=True)
 class ProximityReading:
     """Proximity sensor reading data."""
     distance_mm: int
     zones_in_range: int
     valid: bool = True
-    timestamp: float = 0.0
-    
-    def __post_init__(self):
-        if self.timestamp == 0.0:
-            self.timestamp = time.time()
+    timestamp: float = field(default_factory=time.monotonic)
+
+class VL53L5CXSensor:
+    """High-performance VL53L5CX proximity sensor interface.
 
-class VL53L5CXSensor(SensorInterface):
-    """High-performance VL53L5CX proximity sensor interface."""
+    All blocking driver calls run on a dedicated single-worker pool, so
+    VL53L5CX transactions are serialized with each other and never queue
+    behind other executor work, while reads can still be gathered with the
+    other sensors.
+    """
     
     def __init__(self, config):       
         self.config = config
@@ -26,36 +105,45 @@ class VL53L5CXSensor(SensorInterface):
         self.logger = logging.getLogger(self.__class__.__name__)
         self._last_reading = None
         self._initialized = False
+        self._center_zones = CENTER_ZONES_8X8 if config.resolution == 64 else CENTER_ZONES_4X4
+        # one worker serializes every I2C transaction to the sensor
+        self._io_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="vl53l5cx-io")
+        # bound in initialize(); the per-frame reads reuse it instead of looking it up
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
         
     async def initialize(self) -> bool:
         """Initialize VL53L5CX sensor with optimized settings."""
-        import vl53l5cx_ctypes as vl53l5cx
-        
+        self._loop = asyncio.get_running_loop()
         try:
+            if not VL53L5CX_AVAILABLE:
+                raise ImportError("vl53l5cx_ctypes library not installed")
             self.logger.info("Initializing VL53L5CX sensor...")
+            clock_hz = _i2c_clock_hz()
+            if clock_hz is not None and clock_hz < MIN_I2C_CLOCK_HZ:
+                self.logger.warning(
+                    "I2C bus runs at %d kHz; set dtparam=i2c_arm_baudrate=400000 or higher for full VL53L5CX frame rate",
+                    clock_hz // 1000
+                )
             print("Uploading firmware, please wait...")
             # Initialize sensor with Pimoroni library
             self.sensor = vl53l5cx.VL53L5CX()
-            self._initialized = True
             print("Done!")
                         
             # Optimize for performance
-            await asyncio.get_event_loop().run_in_executor(None, self._init_sensor_blocking)
+            await self._loop.run_in_executor(self._io_pool, self._init_sensor_blocking)
             
             self._initialized = True
             self.logger.info("VL53L5CX initialized successfully")
             return True
             
         except Exception as e:
-            self.logger.error(f"Failed to initialize VL53L5CX: {e}")
+            self.logger.error("Failed to initialize VL53L5CX: %s", e)
             self.sensor = None
             self._initialized = True  # Fall back to simulation
             return True
     
     def _init_sensor_blocking(self) -> None:
         """Blocking sensor initialization operations."""
-        from vl53l5cx.vl53l5cx import VL53L5CX_RESOLUTION_8X8, VL53L5CX_RESOLUTION_4X4
-        
         # Set I2C address
         self.sensor.set_i2c_address(self.config.i2c_address)
         
@@ -78,73 +166,90 @@ class VL53L5CXSensor(SensorInterface):
         if self.config.sharpener_percent is not None:
             self.sensor.set_sharpener_percent(self.config.sharpener_percent)
         
+        # Compile the main loop's kernel now rather than on the first real frame;
+        # _reduce_zones only serves read_proximity() and compiles on first use
+        if NUMBA_AVAILABLE:
+            nearest_distance_mm(np.zeros(64, dtype=np.uint16), 8191)
+        
         # Start ranging
         self.sensor.start_ranging()
     
+    def _poll_and_read_blocking(self):
+        """Return the latest ranging data, or None if no frame is ready."""
+        if self.sensor is None or not self.sensor.check_data_ready():
+            return None
+        return self.sensor.get_ranging_data()
+    
     async def read_proximity(self) -> Optional[ProximityReading]:
         """Read proximity data with performance optimization."""
         if not self._initialized:
             return None
                 
-        # Non-blocking check for data availability
-        data_ready = await asyncio.get_event_loop().run_in_executor(
-            None, self.sensor.check_data_ready
-        )
-        
-        if not data_ready:
-            return self._last_reading
-        
-        # Read data
-        ranging_data = await asyncio.get_event_loop().run_in_executor(
-            None, self.sensor.get_ranging_data
+        # Readiness check and fetch share a single executor hop
+        ranging_data = await self._loop.run_in_executor(
+            self._io_pool, self._poll_and_read_blocking
         )
         
-        # Check if ranging_data is valid
+        # Not ready yet (or no data returned): reuse the last frame while it's fresh
         if ranging_data is None:
-            return self._last_reading
+            last = self._last_reading
+            if last is not None and time.monotonic() - last.timestamp > MAX_READING_AGE_S:
+                return None
+            return last
         
         # Process data efficiently
         reading = self._process_ranging_data(ranging_data)
         self._last_reading = reading
         return reading            
     
+    def _read_frame_blocking(self):
+        """Return the next raw frame, or None if none is ready (blocking I2C)."""
+        if self.sensor is None or not self.sensor.data_ready():
+            return None
+        return self.sensor.get_data()
+    
+    async def read_frame(self):
+        """Fetch the next raw frame on the sensor's I/O worker, or None if none is ready."""
+        return await self._loop.run_in_executor(self._io_pool, self._read_frame_blocking)
     
     def _process_ranging_data(self, data) -> ProximityReading:
         """Process raw ranging data into proximity reading."""
-        # Focus on center 4x4 zones for better performance
-        center_zones = [18, 19, 20, 21, 26, 27, 28, 29, 34, 35, 36, 37, 42, 43, 44, 45]
-        
-        valid_distances = []
-        zones_in_range = 0
-        
-        # Use proximity threshold from config for zone detection
-        zone_threshold = 2000  # Use a reasonable threshold for zone detection
-        
-        for i in center_zones:
-            if i < len(data.distance_mm):
-                distance = data.distance_mm[i]
-                target_status = data.target_status[i]
-                
-                # Check for valid status codes (Pimoroni library uses different codes)
-                # Status 6 = valid target, 13 = valid with low signal, 255 = no target
-                if target_status in [6, 13] and 50 <= distance <= 4000:  # Valid range
-                    valid_distances.append(distance)
-                    if distance <= zone_threshold:  # Use configurable threshold
-                        zones_in_range += 1
-        
-        # Use minimum distance from valid readings
-        min_distance = min(valid_distances) if valid_distances else 4000
+        zone_threshold = ZONE_THRESHOLD_MM
+        
+        if NUMBA_AVAILABLE:
+            min_distance, zones_in_range, n_valid = _reduce_zones(
+                np.asarray(data.distance_mm), np.asarray(data.target_status), self._center_zones, zone_threshold
+            )
+            return ProximityReading(
+                distance_mm=int(min_distance),
+                zones_in_range=int(zones_in_range),
+                valid=n_valid > 0
+            )
+        
+        # Focus on center zones for better performance
+        distances = np.asarray(data.distance_mm)[self._center_zones]
+        status = np.asarray(data.target_status)[self._center_zones]
+        
+        # Check for valid status codes (Pimoroni library uses different codes)
+        # Status 6 = valid target, 13 = valid with low signal, 255 = no target
+        valid = ((status == 6) | (status == 13)) & (distances >= MIN_VALID_MM) & (distances <= MAX_VALID_MM)
+        zones_in_range = int(np.count_nonzero(valid & (distances <= zone_threshold)))
+        
+        # Use minimum distance from valid readings (MAX_VALID_MM when there are none)
+        min_distance = int(distances.min(initial=MAX_VALID_MM, where=valid))
         
         return ProximityReading(
-            distance_mm=int(min_distance),  # Ensure integer
+            distance_mm=min_distance,
             zones_in_range=zones_in_range,
-            valid=len(valid_distances) > 0
+            valid=bool(valid.any())
         )
         
     async def cleanup(self) -> None:
         """Clean up VL53L5CX sensor."""
         if self.sensor:
             try:
-                await asyncio.get_event_loop().run_in_executor(None, self.sensor.stop_ranging)
+                loop = self._loop or asyncio.get_running_loop()
+                await loop.run_in_executor(self._io_pool, self.sensor.stop_ranging)
             except Exception as e:
-                self.logger.error(f"Error stopping VL53L5CX: {e}")
\ No newline at end of file
+                self.logger.error("Error stopping VL53L5CX: %s", e)
+        self._io_pool.shutdown(wait=False)
\ No newline at end of file